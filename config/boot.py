@@ -0,0 +1,102 @@
+"""
+Boot-time warmup for production workers.
+
+``config/wsgi.py`` and ``config/asgi.py`` call :func:`warm_up` after building
+the application when ``DJANGO_WARMUP_ON_BOOT`` is set. Run the server with
+preloading (e.g. ``gunicorn --preload``) so the warmup happens once in the
+master process and forked workers inherit the warm state.
+"""
+
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.core.signals import request_started
+from django.db import connections
+from django.urls import get_resolver, resolve
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(boot_started: float):
+    """Warm the app, then start tracking time-to-first-request from `boot_started`."""
+    from django.conf import settings
+
+    if settings.WARMUP_ON_BOOT:
+        # Run in a plain thread: ASGI servers may import the app inside a
+        # running event loop, where Django refuses synchronous ORM calls.
+        thread = threading.Thread(target=_run_steps)
+        thread.start()
+        thread.join()
+        logger.info("Boot finished in %.1f ms", (time.perf_counter() - boot_started) * 1000)
+
+    _track_time_to_first_request(boot_started)
+
+
+def _run_steps():
+    steps = [
+        ("URL resolver", _populate_urls),
+        ("model metadata", _load_model_metadata),
+        ("DRF renderers", _load_renderers),
+        ("reference data", _warm_reference_data),
+    ]
+    try:
+        for name, step in steps:
+            started = time.perf_counter()
+            step()
+            logger.info("Warmup step '%s' took %.1f ms", name, (time.perf_counter() - started) * 1000)
+    except Exception:
+        logger.exception("Warmup failed; workers will start cold")
+    finally:
+        # Connections must not be shared with forked workers.
+        connections.close_all()
+
+
+def _populate_urls():
+    # Accessing reverse_dict populates the resolver's lazy lookup tables.
+    get_resolver().reverse_dict
+    resolve("/api/languages/")
+
+
+def _load_model_metadata():
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def _load_renderers():
+    from rest_framework.settings import api_settings
+
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        renderer_class()
+    for parser_class in api_settings.DEFAULT_PARSER_CLASSES:
+        parser_class()
+
+
+def _warm_reference_data():
+    _get("/api/languages/")
+
+
+def _get(path: str):
+    # Imported lazily: django.test is costly and only needed when warming up.
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(path)
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    response.render()
+    return response
+
+
+FIRST_REQUEST_DISPATCH_UID = "config.boot.first_request"
+
+
+def _track_time_to_first_request(boot_started: float):
+    def on_first_request(sender, **kwargs):
+        request_started.disconnect(dispatch_uid=FIRST_REQUEST_DISPATCH_UID)
+        logger.info(
+            "First request started %.1f ms after boot",
+            (time.perf_counter() - boot_started) * 1000,
+        )
+
+    request_started.connect(on_first_request, weak=False, dispatch_uid=FIRST_REQUEST_DISPATCH_UID)
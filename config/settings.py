@@ -60,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'main.profiling.RequestProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -142,3 +143,43 @@ CORS_ALLOWED_ORIGINS = [
     for origin in _cors_origins_raw.split(",")
     if origin.strip()
 ]
+
+# On-demand request profiling (see main/profiling.py). Off by default; when
+# disabled the middleware is removed at startup.
+API_PROFILING_ENABLED = os.getenv("API_PROFILING_ENABLED", "False").lower() in {"1", "true", "yes", "on"}
+API_PROFILING_DIR = Path(os.getenv("API_PROFILING_DIR", BASE_DIR / "profiles"))
+API_PROFILING_MAX_PROFILES = int(os.getenv("API_PROFILING_MAX_PROFILES", "50"))
+API_PROFILING_MAX_AGE_SECONDS = int(os.getenv("API_PROFILING_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+API_PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("API_PROFILING_SAMPLE_INTERVAL_MS", "1"))
+
+# Boot-time warmup (see config/boot.py).
+WARMUP_ON_BOOT = os.getenv("DJANGO_WARMUP_ON_BOOT", "False").lower() in {"1", "true", "yes", "on"}
+
+# Reverse-proxy caching (see main/caching.py and main/purge.py). Policies are
+# keyed by the view's `cache_policy`; purges are sent on commit to
+# CACHE_PURGE_BACKEND, which defaults to a no-op. Failed purges are retried
+# CACHE_PURGE_RETRIES times; a purge that still fails leaves the entry stale
+# until its s-maxage expires.
+CACHE_CONTROL_POLICIES = {
+    "language-list": "public, max-age=300, s-maxage=86400",
+    "situations-by-language": "public, max-age=60, s-maxage=86400",
+    "situation-detail": "public, max-age=60, s-maxage=604800",
+}
+SURROGATE_KEY_HEADER = os.getenv("SURROGATE_KEY_HEADER", "Surrogate-Key")
+CACHE_PURGE_BACKEND = os.getenv("CACHE_PURGE_BACKEND", "main.purge.NullPurgeBackend")
+CACHE_PURGE_URL = os.getenv("CACHE_PURGE_URL", "")
+CACHE_PURGE_METHOD = os.getenv("CACHE_PURGE_METHOD", "PURGE")
+CACHE_PURGE_TIMEOUT = float(os.getenv("CACHE_PURGE_TIMEOUT", "2"))
+CACHE_PURGE_RETRIES = int(os.getenv("CACHE_PURGE_RETRIES", "3"))
+CACHE_PURGE_RETRY_DELAY = float(os.getenv("CACHE_PURGE_RETRY_DELAY", "1"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "config.boot": {"handlers": ["console"], "level": "INFO"},
+    },
+}
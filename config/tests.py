@@ -0,0 +1,57 @@
+import time
+from unittest import mock
+
+from django.core.signals import request_started
+from django.test import TestCase, override_settings
+
+from config import boot
+
+
+class WarmUpTests(TestCase):
+    def warm_up(self):
+        with mock.patch.object(boot, "connections") as connections:
+            boot.warm_up(time.perf_counter())
+        self.addCleanup(request_started.disconnect, dispatch_uid=boot.FIRST_REQUEST_DISPATCH_UID)
+        return connections
+
+    @override_settings(WARMUP_ON_BOOT=True)
+    def test_runs_each_step_and_closes_connections(self):
+        with self.assertLogs("config.boot", "INFO") as logs:
+            connections = self.warm_up()
+
+        steps = [line for line in logs.output if "Warmup step" in line]
+        self.assertEqual(
+            [line.split("'")[1] for line in steps],
+            ["URL resolver", "model metadata", "DRF renderers", "reference data"],
+        )
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(WARMUP_ON_BOOT=True)
+    def test_failed_step_still_closes_connections(self):
+        with (
+            mock.patch.object(boot, "_load_model_metadata", side_effect=RuntimeError),
+            self.assertLogs("config.boot", "INFO") as logs,
+        ):
+            connections = self.warm_up()
+
+        self.assertTrue(any("Warmup failed" in line for line in logs.output))
+        self.assertFalse(any("'DRF renderers'" in line for line in logs.output))
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(WARMUP_ON_BOOT=False)
+    def test_disabled_warmup_runs_no_steps(self):
+        with self.assertNoLogs("config.boot", "INFO"):
+            connections = self.warm_up()
+
+        connections.close_all.assert_not_called()
+
+    @override_settings(WARMUP_ON_BOOT=False)
+    def test_first_request_is_logged_once(self):
+        self.warm_up()
+
+        with self.assertLogs("config.boot", "INFO") as logs:
+            request_started.send(sender=self.__class__)
+            request_started.send(sender=self.__class__)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("First request started", logs.output[0])
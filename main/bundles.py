@@ -0,0 +1,350 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .caching import (
+    SITUATIONS_KEY,
+    communication_key,
+    communication_language_key,
+    prompt_key,
+    situation_key,
+    utterance_key,
+)
+from .models import Communication, Context, Language, Prompt, Situation, Utterance
+from .purge import queue_purge
+
+SITUATION_FIELDS = ("image_url", "description")
+PROMPT_FIELDS = ("description",)
+COMMUNICATION_FIELDS = ("description", "shouldBeExpressed", "shouldBeUnderstood")
+UTTERANCE_FIELDS = ("language_id", "transliteration", "content")
+CONTEXT_FIELDS = ("context_type", "description")
+
+
+def _new_stats():
+    return {"created": 0, "updated": 0, "deleted": 0}
+
+
+def _assign(instance, values: dict, fields) -> bool:
+    """Copy `values` onto `instance`; return whether anything changed."""
+    changed = False
+    for field in fields:
+        if getattr(instance, field) != values[field]:
+            setattr(instance, field, values[field])
+            changed = True
+    return changed
+
+
+def _check_unique_ids(items, label: str):
+    seen = set()
+    for item in items:
+        item_id = item.get("id")
+        if item_id is None:
+            continue
+        if item_id in seen:
+            raise ValidationError({"detail": f"{label} {item_id} appears more than once in the bundle."})
+        seen.add(item_id)
+
+
+class SituationBundleWriter:
+    """
+    Applies a situation bundle (the `SituationDetailView` shape) to the database.
+
+    The bundle is diffed against stored rows and all creates, updates and
+    deletes run inside one transaction using bulk operations. `last_updated`
+    is only bumped on rows whose content actually changed.
+
+    Scope rules:
+
+    - Prompts missing from the bundle are detached from the situation, not
+      deleted, because they can be shared between situations.
+    - Utterance removal is scoped to `target_lang`, the language the bundle
+      was fetched for: only `target_lang` utterances missing from the bundle
+      are deleted, including those of communications left out entirely.
+      Communications stay attached, so bundles in other languages are not
+      affected. Without `target_lang` no utterances are deleted.
+    - Contexts are owned by their utterance and replaced as a whole. Since
+      contexts have no timestamp, a context change bumps its utterance.
+
+    Bulk operations bypass model signals, so the writer queues the cache
+    purges for the rows it changed itself.
+    """
+
+    def __init__(self, situation: Situation, data: dict, target_lang: str | None = None):
+        self.situation = situation
+        self.data = data
+        self.target_lang = target_lang
+        self.now = timezone.now()
+        self.purge_keys = set()
+        self.stats = {
+            "situation": _new_stats(),
+            "prompts": _new_stats(),
+            "communications": _new_stats(),
+            "utterances": _new_stats(),
+            "contexts": _new_stats(),
+        }
+
+    def apply(self) -> dict:
+        situation_id = self.data["situation"].get("id")
+        if situation_id is not None and situation_id != self.situation.pk:
+            raise ValidationError(
+                {"detail": f"Bundle situation id {situation_id} does not match URL id {self.situation.pk}."}
+            )
+
+        with transaction.atomic():
+            self.situation = Situation.objects.select_for_update().get(pk=self.situation.pk)
+            self._languages = self._resolve_languages()
+            membership_changed = self._apply_prompts()
+            membership_changed |= self._apply_communications()
+            self._apply_situation(membership_changed)
+            queue_purge(self.purge_keys)
+
+        return self.stats
+
+    def _resolve_languages(self) -> dict:
+        codes = {
+            utterance["language"]
+            for communication in self.data["communications"]
+            for utterance in communication["utterances"]
+        }
+        languages = {language.code: language for language in Language.objects.filter(code__in=codes)}
+        missing = sorted(codes - languages.keys())
+        if missing:
+            raise ValidationError({"detail": f"Unknown language codes: {', '.join(missing)}."})
+        return languages
+
+    def _apply_situation(self, membership_changed: bool):
+        changed = _assign(self.situation, self.data["situation"], SITUATION_FIELDS)
+        if changed or membership_changed:
+            self.situation.last_updated = self.now
+            Situation.objects.filter(pk=self.situation.pk).update(
+                last_updated=self.now,
+                **{field: getattr(self.situation, field) for field in SITUATION_FIELDS},
+            )
+            self.stats["situation"]["updated"] = 1
+            self.purge_keys.update((situation_key(self.situation.pk), SITUATIONS_KEY))
+
+    def _apply_prompts(self) -> bool:
+        payload = self.data["prompts"]
+        _check_unique_ids(payload, "Prompt")
+        existing = {prompt.pk: prompt for prompt in self.situation.prompts.all()}
+
+        to_create, to_update = [], []
+        for item in payload:
+            if item.get("id") is None:
+                to_create.append(Prompt(description=item["description"]))
+                continue
+            prompt = existing.get(item["id"])
+            if prompt is None:
+                raise ValidationError({"detail": f"Prompt {item['id']} does not belong to situation {self.situation.pk}."})
+            if _assign(prompt, item, PROMPT_FIELDS):
+                prompt.last_updated = self.now
+                to_update.append(prompt)
+
+        kept_ids = {item["id"] for item in payload if item.get("id") is not None}
+        removed_ids = [pk for pk in existing if pk not in kept_ids]
+
+        if to_create:
+            Prompt.objects.bulk_create(to_create)
+            self.situation.prompts.add(*to_create)
+        if to_update:
+            Prompt.objects.bulk_update(to_update, PROMPT_FIELDS + ("last_updated",))
+            self.purge_keys.update(prompt_key(prompt.pk) for prompt in to_update)
+        if removed_ids:
+            self.situation.prompts.remove(*removed_ids)
+
+        self.stats["prompts"].update(
+            created=len(to_create), updated=len(to_update), deleted=len(removed_ids)
+        )
+        return bool(to_create or removed_ids)
+
+    def _apply_communications(self) -> bool:
+        payload = self.data["communications"]
+        _check_unique_ids(payload, "Communication")
+        _check_unique_ids(
+            [utterance for item in payload for utterance in item["utterances"]], "Utterance"
+        )
+        _check_unique_ids(
+            [
+                context
+                for item in payload
+                for utterance in item["utterances"]
+                for context in utterance["contexts"]
+            ],
+            "Context",
+        )
+
+        existing = {
+            communication.pk: communication
+            for communication in self.situation.communications_of_situation.prefetch_related(
+                "utterances_of_communication__language",
+                "utterances_of_communication__contexts",
+            )
+        }
+
+        new_communications, updated_communications = [], []
+        pairs = []
+        for item in payload:
+            if item.get("id") is None:
+                communication = Communication(
+                    **{field: item[field] for field in COMMUNICATION_FIELDS}
+                )
+                new_communications.append(communication)
+            else:
+                communication = existing.get(item["id"])
+                if communication is None:
+                    raise ValidationError(
+                        {"detail": f"Communication {item['id']} does not belong to situation {self.situation.pk}."}
+                    )
+                if _assign(communication, item, COMMUNICATION_FIELDS):
+                    communication.last_updated = self.now
+                    updated_communications.append(communication)
+            pairs.append((communication, item))
+
+        # Communications left out of the bundle keep their place in the
+        # situation; only their `target_lang` utterances are removed.
+        kept_ids = {item["id"] for item in payload if item.get("id") is not None}
+        pairs.extend(
+            (communication, {"id": pk, "utterances": []})
+            for pk, communication in existing.items()
+            if pk not in kept_ids
+        )
+
+        if new_communications:
+            Communication.objects.bulk_create(new_communications)
+            self.situation.communications_of_situation.add(*new_communications)
+        if updated_communications:
+            Communication.objects.bulk_update(
+                updated_communications, COMMUNICATION_FIELDS + ("last_updated",)
+            )
+            self.purge_keys.update(
+                communication_key(communication.pk) for communication in updated_communications
+            )
+
+        self.stats["communications"].update(
+            created=len(new_communications),
+            updated=len(updated_communications),
+        )
+
+        self._apply_utterances(pairs)
+        return bool(new_communications)
+
+    def _apply_utterances(self, pairs):
+        new_utterances, updated_utterances, removed_ids = [], [], []
+        context_pairs = []
+
+        for communication, item in pairs:
+            existing = (
+                {utterance.pk: utterance for utterance in communication.utterances_of_communication.all()}
+                if item.get("id") is not None
+                else {}
+            )
+            for utterance_item in item["utterances"]:
+                values = {
+                    "language_id": self._languages[utterance_item["language"]].pk,
+                    "transliteration": utterance_item["transliteration"],
+                    "content": utterance_item["content"],
+                }
+                if utterance_item.get("id") is None:
+                    utterance = Utterance(communication=communication, **values)
+                    new_utterances.append(utterance)
+                    existing_contexts = None
+                else:
+                    utterance = existing.get(utterance_item["id"])
+                    if utterance is None:
+                        raise ValidationError(
+                            {"detail": f"Utterance {utterance_item['id']} does not belong to communication {communication.pk}."}
+                        )
+                    existing_contexts = {context.pk: context for context in utterance.contexts.all()}
+                    if utterance.language_id != values["language_id"]:
+                        # The communication leaves the old language's bundles
+                        # and may join the new language's ones.
+                        self.purge_keys.update(
+                            communication_language_key(communication.pk, language_id)
+                            for language_id in (utterance.language_id, values["language_id"])
+                        )
+                    if _assign(utterance, values, UTTERANCE_FIELDS):
+                        utterance.last_updated = self.now
+                        updated_utterances.append(utterance)
+                context_pairs.append((utterance, utterance_item["contexts"], existing_contexts))
+
+            kept_ids = {u["id"] for u in item["utterances"] if u.get("id") is not None}
+            removed_ids.extend(
+                pk
+                for pk, utterance in existing.items()
+                if pk not in kept_ids and utterance.language.code == self.target_lang
+            )
+
+        if new_utterances:
+            Utterance.objects.bulk_create(new_utterances)
+            self.purge_keys.update(
+                communication_language_key(utterance.communication_id, utterance.language_id)
+                for utterance in new_utterances
+            )
+
+        touched = self._apply_contexts(context_pairs)
+        for utterance in touched:
+            if utterance.last_updated != self.now:
+                utterance.last_updated = self.now
+                updated_utterances.append(utterance)
+
+        if updated_utterances:
+            Utterance.objects.bulk_update(updated_utterances, UTTERANCE_FIELDS + ("last_updated",))
+            self.purge_keys.update(utterance_key(utterance.pk) for utterance in updated_utterances)
+        if removed_ids:
+            Utterance.objects.filter(pk__in=removed_ids).delete()
+
+        self.stats["utterances"].update(
+            created=len(new_utterances),
+            updated=len(updated_utterances),
+            deleted=len(removed_ids),
+        )
+
+    def _apply_contexts(self, context_pairs) -> list:
+        """
+        Diff contexts per utterance; return existing utterances whose contexts changed.
+
+        `existing` is `None` for utterances created in this write.
+        """
+        new_contexts, updated_contexts, removed_ids = [], [], []
+        touched = []
+
+        for utterance, payload, existing in context_pairs:
+            is_new = existing is None
+            existing = existing or {}
+            changed = False
+            for item in payload:
+                if item.get("id") is None:
+                    new_contexts.append(
+                        Context(utterance=utterance, **{field: item[field] for field in CONTEXT_FIELDS})
+                    )
+                    changed = True
+                    continue
+                context = existing.get(item["id"])
+                if context is None:
+                    raise ValidationError(
+                        {"detail": f"Context {item['id']} does not belong to utterance {utterance.pk}."}
+                    )
+                if _assign(context, item, CONTEXT_FIELDS):
+                    updated_contexts.append(context)
+                    changed = True
+
+            kept_ids = {c["id"] for c in payload if c.get("id") is not None}
+            stale = [pk for pk in existing if pk not in kept_ids]
+            if stale:
+                removed_ids.extend(stale)
+                changed = True
+
+            if changed and not is_new:
+                touched.append(utterance)
+
+        if new_contexts:
+            Context.objects.bulk_create(new_contexts)
+        if updated_contexts:
+            Context.objects.bulk_update(updated_contexts, CONTEXT_FIELDS)
+        if removed_ids:
+            Context.objects.filter(pk__in=removed_ids).delete()
+
+        self.stats["contexts"].update(
+            created=len(new_contexts), updated=len(updated_contexts), deleted=len(removed_ids)
+        )
+        return touched
@@ -0,0 +1,64 @@
+from django.conf import settings
+
+LANGUAGES_KEY = "languages"
+SITUATIONS_KEY = "situations"
+
+
+def language_key(code: str) -> str:
+    return f"language-{code}"
+
+
+def situation_key(situation_id: int) -> str:
+    return f"situation-{situation_id}"
+
+
+def prompt_key(prompt_id: int) -> str:
+    return f"prompt-{prompt_id}"
+
+
+def communication_key(communication_id: int) -> str:
+    return f"communication-{communication_id}"
+
+
+def communication_language_key(communication_id: int, language_id: int) -> str:
+    # Tags every bundle of a situation containing the communication, in one
+    # target language, whether or not the communication has utterances in it.
+    return f"communication-{communication_id}-language-{language_id}"
+
+
+def utterance_key(utterance_id: int) -> str:
+    return f"utterance-{utterance_id}"
+
+
+def context_type_key(name: str) -> str:
+    # Surrogate keys are space-separated, so keep them single tokens.
+    return "context-type-" + "_".join(name.split())
+
+
+class CachePolicyMixin:
+    """
+    Adds `Cache-Control` and surrogate-key headers to successful GET responses.
+
+    `cache_policy` names an entry in `CACHE_CONTROL_POLICIES`; views override
+    `get_surrogate_keys` to tag the response with the content it contains so
+    a reverse proxy can purge it precisely (see `main.purge`).
+    """
+
+    cache_policy: str | None = None
+
+    def get_surrogate_keys(self, request, response) -> list[str]:
+        return []
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ("GET", "HEAD") or response.status_code != 200:
+            return response
+
+        policy = settings.CACHE_CONTROL_POLICIES.get(self.cache_policy)
+        if policy and not response.has_header("Cache-Control"):
+            response["Cache-Control"] = policy
+
+        keys = self.get_surrogate_keys(request, response)
+        if keys:
+            response[settings.SURROGATE_KEY_HEADER] = " ".join(dict.fromkeys(keys))
+        return response
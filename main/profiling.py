@@ -0,0 +1,190 @@
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SKIPPED_HEADER = "X-Profile-Skipped"
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+# cProfile hooks into interpreter-wide sys.monitoring on Python 3.12+, so only
+# one profile can run per process at a time.
+_profile_lock = threading.Lock()
+
+
+class _StackSampler(threading.Thread):
+    """Samples the call stack of one thread into collapsed (flame-graph) form."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _QueryRecorder:
+    """Database execute wrapper that records each statement and its duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "sql": sql,
+                    "params": repr(params),
+                    "many": many,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                }
+            )
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in profiler for API requests.
+
+    Active only when ``API_PROFILING_ENABLED`` is set; otherwise Django drops
+    the middleware at startup. A staff user triggers a profile by sending the
+    ``X-Profile: 1`` header or the ``?profile=1`` query parameter. Each profile
+    is written to ``API_PROFILING_DIR`` as a cProfile dump (``.prof``), sampled
+    collapsed stacks for flame graphs (``.folded``) and a JSON summary with the
+    SQL statements and their timings. The profile id is returned in the
+    ``X-Profile-Id`` response header.
+
+    Only one request per process is profiled at a time. A profiled request
+    that arrives while another is running is served unprofiled and gets an
+    ``X-Profile-Skipped: busy`` header instead. The cProfile dump may still
+    include calls made by other threads during the profile.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.directory = Path(settings.API_PROFILING_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+
+        if not _profile_lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response[PROFILE_SKIPPED_HEADER] = "busy"
+            return response
+        try:
+            return self._profile(request)
+        finally:
+            _profile_lock.release()
+
+    def _profile(self, request):
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        recorder = _QueryRecorder()
+        sampler = _StackSampler(
+            threading.get_ident(),
+            settings.API_PROFILING_SAMPLE_INTERVAL_MS / 1000,
+        )
+        # Imported lazily: the profile module costs ~13 ms at import, and this
+        # middleware module is loaded on every boot even when disabled.
+        import cProfile
+
+        profiler = cProfile.Profile()
+
+        started_at = time.perf_counter()
+        sampler.start()
+        try:
+            with connection.execute_wrapper(recorder):
+                response = profiler.runcall(self.get_response, request)
+        finally:
+            sampler.stop()
+        duration_ms = (time.perf_counter() - started_at) * 1000
+
+        self._store(profile_id, request, response, duration_ms, profiler, sampler, recorder)
+        self._enforce_retention()
+
+        response[PROFILE_ID_HEADER] = profile_id
+        # Profiled responses must never be stored by the reverse proxy.
+        response["Cache-Control"] = "private, no-store"
+        return response
+
+    def _should_profile(self, request) -> bool:
+        if not request.path.startswith("/api/"):
+            return False
+
+        requested = (
+            request.META.get(PROFILE_HEADER, "").lower() in _TRUTHY
+            or request.GET.get(PROFILE_QUERY_PARAM, "").lower() in _TRUTHY
+        )
+        if not requested:
+            return False
+
+        user = getattr(request, "user", None)
+        return bool(user and user.is_authenticated and user.is_staff)
+
+    def _store(self, profile_id, request, response, duration_ms, profiler, sampler, recorder):
+        base = self.directory / profile_id
+        profiler.dump_stats(f"{base}.prof")
+        Path(f"{base}.folded").write_text(sampler.collapsed())
+        summary = {
+            "id": profile_id,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status_code": response.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "sql_count": len(recorder.queries),
+            "sql_duration_ms": round(sum(q["duration_ms"] for q in recorder.queries), 3),
+            "sql": recorder.queries,
+        }
+        Path(f"{base}.json").write_text(json.dumps(summary, indent=2))
+
+    def _enforce_retention(self):
+        # Other workers may prune the same directory concurrently, so read
+        # each mtime once and skip files that have already vanished.
+        summaries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                summaries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        summaries.sort(reverse=True)
+
+        cutoff = time.time() - settings.API_PROFILING_MAX_AGE_SECONDS
+        for index, (mtime, summary) in enumerate(summaries):
+            if index < settings.API_PROFILING_MAX_PROFILES and mtime >= cutoff:
+                continue
+            for suffix in (".json", ".prof", ".folded"):
+                summary.with_suffix(suffix).unlink(missing_ok=True)
@@ -0,0 +1,148 @@
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BasePurgeBackend:
+    """Sends surrogate-key purges to a caching proxy."""
+
+    def purge(self, keys: list[str]):
+        raise NotImplementedError
+
+
+class NullPurgeBackend(BasePurgeBackend):
+    def purge(self, keys: list[str]):
+        pass
+
+
+class HTTPPurgeBackend(BasePurgeBackend):
+    """
+    Issues one HTTP request per batch of keys to `CACHE_PURGE_URL`.
+
+    Keys are sent space-separated in the `SURROGATE_KEY_HEADER` header using
+    `CACHE_PURGE_METHOD`, which matches Varnish xkey and Fastly-style purges.
+    """
+
+    batch_size = 256
+
+    def __init__(self):
+        self.url = settings.CACHE_PURGE_URL
+        self.method = settings.CACHE_PURGE_METHOD
+        self.header = settings.SURROGATE_KEY_HEADER
+        self.timeout = settings.CACHE_PURGE_TIMEOUT
+
+    def purge(self, keys: list[str]):
+        # Imported lazily so the default no-op backend does not pay for it.
+        import urllib.request
+
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            request = urllib.request.Request(
+                self.url,
+                method=self.method,
+                headers={self.header: " ".join(batch)},
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+
+
+@functools.lru_cache(maxsize=None)
+def get_purge_backend() -> BasePurgeBackend:
+    return import_string(settings.CACHE_PURGE_BACKEND)()
+
+
+class PurgeWorker:
+    """
+    Sends queued purges from a background thread, retrying failures.
+
+    Batches waiting in the queue are merged into one purge, so a burst of
+    commits costs one request per `HTTPPurgeBackend.batch_size` keys. A purge
+    is attempted `CACHE_PURGE_RETRIES + 1` times with exponential backoff
+    starting at `CACHE_PURGE_RETRY_DELAY` seconds, then logged and dropped;
+    the proxy then serves the stale entry until its `s-maxage` runs out.
+
+    The thread is a daemon started on first use, and restarted in a forked
+    child, so purges still queued when the process exits are lost.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def submit(self, keys: frozenset[str]):
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="cache-purge", daemon=True
+                )
+                self._thread.start()
+            self._queue.put(keys)
+
+    def join(self):
+        """Block until every submitted purge has been sent or given up on."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batches = [pending.get()]
+            while True:
+                try:
+                    batches.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._send(sorted(frozenset().union(*batches)))
+            finally:
+                for _ in batches:
+                    pending.task_done()
+
+    def _send(self, keys: list[str]):
+        retries = settings.CACHE_PURGE_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                get_purge_backend().purge(keys)
+                return
+            except Exception:
+                if attempt == retries:
+                    logger.exception(
+                        "Cache purge failed after %d attempts for keys: %s",
+                        attempt + 1,
+                        " ".join(keys),
+                    )
+                    return
+                logger.warning("Cache purge failed, retrying", exc_info=True)
+                time.sleep(settings.CACHE_PURGE_RETRY_DELAY * 2**attempt)
+
+
+_worker = PurgeWorker()
+
+
+def queue_purge(keys):
+    """
+    Purge `keys` once the current transaction commits.
+
+    Keys from a rolled-back transaction are dropped with its on-commit hooks.
+    Sending happens in the background (see `PurgeWorker`).
+    """
+    keys = frozenset(keys)
+    if keys:
+        transaction.on_commit(functools.partial(_worker.submit, keys))
+
+
+def wait_for_purges():
+    """Block until purges already handed to the worker are done."""
+    _worker.join()
@@ -18,3 +18,44 @@ class SituationSerializer(serializers.ModelSerializer):
 
     def get_language_code(self, obj):
         return self.context.get("language_code")
+
+
+class BundleContextSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    context_type = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True)
+
+
+class BundleUtteranceSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    language = serializers.CharField(max_length=3)
+    transliteration = serializers.CharField(max_length=255, allow_blank=True)
+    content = serializers.CharField()
+    contexts = BundleContextSerializer(many=True, allow_empty=True)
+
+
+class BundleCommunicationSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(allow_blank=True)
+    shouldBeExpressed = serializers.BooleanField()
+    shouldBeUnderstood = serializers.BooleanField()
+    utterances = BundleUtteranceSerializer(many=True, allow_empty=True)
+
+
+class BundlePromptSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(allow_blank=True)
+
+
+class BundleSituationSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    image_url = serializers.URLField(allow_blank=True)
+    description = serializers.CharField(allow_blank=True)
+
+
+class SituationBundleSerializer(serializers.Serializer):
+    """Input shape for bundle writes; mirrors the `SituationDetailView` response."""
+
+    situation = BundleSituationSerializer()
+    prompts = BundlePromptSerializer(many=True, allow_empty=True)
+    communications = BundleCommunicationSerializer(many=True, allow_empty=True)
@@ -0,0 +1,138 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .caching import (
+    LANGUAGES_KEY,
+    SITUATIONS_KEY,
+    communication_key,
+    communication_language_key,
+    context_type_key,
+    language_key,
+    prompt_key,
+    situation_key,
+    utterance_key,
+)
+from .models import (
+    Communication,
+    Context,
+    ContextType,
+    Language,
+    Prompt,
+    Situation,
+    Utterance,
+)
+from .purge import queue_purge
+
+# Fields whose previous value decides which keys a save must purge, besides
+# the current one. They are snapshotted on load and after every save.
+_SNAPSHOT_FIELDS = {
+    Language: ("code",),
+    Utterance: ("communication_id", "language_id"),
+    Context: ("utterance_id",),
+}
+
+
+def _snapshot(instance):
+    # Read __dict__ directly so deferred fields do not trigger a query.
+    fields = _SNAPSHOT_FIELDS[type(instance)]
+    instance._purge_snapshot = tuple(instance.__dict__.get(field) for field in fields)
+
+
+def _utterance_keys(utterance_id, communication_id, language_id) -> list[str]:
+    # An utterance joining or leaving a (communication, language) pair can
+    # add or drop the communication from bundles that never carried its key.
+    return [
+        utterance_key(utterance_id),
+        communication_language_key(communication_id, language_id),
+    ]
+
+
+def _keys_for(instance, created: bool = False) -> list[str]:
+    if isinstance(instance, Language):
+        (old_code,) = instance._purge_snapshot
+        keys = [LANGUAGES_KEY, language_key(instance.code)]
+        if old_code not in (None, instance.code):
+            keys.append(language_key(old_code))
+        return keys
+    if isinstance(instance, Situation):
+        return [SITUATIONS_KEY, situation_key(instance.pk)]
+    if isinstance(instance, Prompt):
+        return [prompt_key(instance.pk)]
+    if isinstance(instance, Communication):
+        return [communication_key(instance.pk)]
+    if isinstance(instance, Utterance):
+        parent = (instance.communication_id, instance.language_id)
+        if not created and instance._purge_snapshot == parent:
+            # Content edits only affect bundles already showing the utterance.
+            return [utterance_key(instance.pk)]
+        keys = _utterance_keys(instance.pk, *parent)
+        if not created and None not in instance._purge_snapshot:
+            keys.extend(_utterance_keys(instance.pk, *instance._purge_snapshot))
+        return keys
+    if isinstance(instance, Context):
+        (old_utterance_id,) = instance._purge_snapshot
+        keys = [utterance_key(instance.utterance_id)]
+        if old_utterance_id not in (None, instance.utterance_id):
+            keys.append(utterance_key(old_utterance_id))
+        return keys
+    if isinstance(instance, ContextType):
+        return [context_type_key(instance.name)]
+    return []
+
+
+_TRACKED_MODELS = (Language, Situation, Prompt, Communication, Utterance, Context, ContextType)
+
+
+def purge_on_change(sender, instance, created=False, **kwargs):
+    # A deleted row is purged like a newly created one: only its current
+    # parents are affected.
+    deleted = kwargs["signal"] is post_delete
+    queue_purge(_keys_for(instance, created or deleted))
+    if sender in _SNAPSHOT_FIELDS:
+        _snapshot(instance)
+
+
+def snapshot_on_init(sender, instance, **kwargs):
+    _snapshot(instance)
+
+
+for _model in _TRACKED_MODELS:
+    post_save.connect(purge_on_change, sender=_model)
+    post_delete.connect(purge_on_change, sender=_model)
+
+for _model in _SNAPSHOT_FIELDS:
+    post_init.connect(snapshot_on_init, sender=_model)
+
+
+@receiver(m2m_changed, sender=Situation.target_languages.through)
+def purge_on_target_languages_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        # `instance` is a Language; `pk_set` holds situation ids.
+        situation_ids = (
+            pk_set
+            if pk_set is not None
+            else instance.situations_available_as_target.values_list("pk", flat=True)
+        )
+        keys = [situation_key(pk) for pk in situation_ids]
+        keys.append(language_key(instance.code))
+    else:
+        keys = [situation_key(instance.pk), SITUATIONS_KEY]
+    queue_purge(keys)
+
+
+@receiver(m2m_changed, sender=Prompt.situations.through)
+@receiver(m2m_changed, sender=Communication.situations.through)
+def purge_on_situation_membership_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        # `instance` is a Situation; `pk_set` holds prompt or communication ids.
+        keys = [situation_key(instance.pk)]
+    else:
+        situation_ids = pk_set if pk_set is not None else instance.situations.values_list("pk", flat=True)
+        keys = [situation_key(pk) for pk in situation_ids]
+    queue_purge(keys)
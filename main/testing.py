@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+
+
+class LocalPurgeServer:
+    """
+    Local HTTP stand-in for the caching proxy, for tests and development.
+
+    Records every purge request it receives in `requests` as
+    `(method, path, keys)` tuples. Use as a context manager and point
+    `CACHE_PURGE_URL` at `url`.
+    """
+
+    def __init__(self, header: str | None = None):
+        self.header = header or settings.SURROGATE_KEY_HEADER
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    @property
+    def purged_keys(self) -> set[str]:
+        return {key for _, _, keys in self.requests for key in keys}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _record(self):
+                keys = self.headers.get(server.header, "").split()
+                server.requests.append((self.command, self.path, keys))
+                self.send_response(200)
+                self.end_headers()
+
+            do_PURGE = do_POST = do_BAN = _record
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
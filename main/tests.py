@@ -0,0 +1,443 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from . import profiling
+from .models import Communication, Context, Language, Prompt, Situation, Utterance
+from .purge import BasePurgeBackend, get_purge_backend, wait_for_purges
+from .testing import LocalPurgeServer
+
+
+class BundleTestData:
+    """Situation with a spa-only communication and a deu-only communication."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.spa = Language.objects.create(code="spa", name="Spanish")
+        cls.deu = Language.objects.create(code="deu", name="German")
+        cls.eng = Language.objects.create(code="eng", name="English")
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+
+        cls.situation = Situation.objects.create(description="Meeting someone.")
+        cls.situation.target_languages.add(cls.spa, cls.deu)
+        cls.greeting = Communication.objects.create(
+            description="Greeting", shouldBeExpressed=True, shouldBeUnderstood=True
+        )
+        cls.farewell = Communication.objects.create(
+            description="Farewell", shouldBeExpressed=True, shouldBeUnderstood=False
+        )
+        cls.situation.communications_of_situation.add(cls.greeting, cls.farewell)
+        cls.hola = Utterance.objects.create(communication=cls.greeting, language=cls.spa, content="Hola")
+        cls.tschuess = Utterance.objects.create(
+            communication=cls.farewell, language=cls.deu, content="Tschüss"
+        )
+
+    def bundle_url(self, target_lang=None):
+        url = f"/api/situations/{self.situation.pk}/"
+        return f"{url}?target_lang={target_lang}" if target_lang else url
+
+    def get_bundle(self, target_lang):
+        return self.client.get(
+            f"/api/situations/{self.situation.pk}/",
+            {"target_lang": target_lang, "native_lang": "eng"},
+        )
+
+    def put_bundle(self, bundle, target_lang=None):
+        return self.client.put(self.bundle_url(target_lang), bundle, content_type="application/json")
+
+
+class FlakyPurgeBackend(BasePurgeBackend):
+    """Fails the first purge it receives."""
+
+    calls = []
+
+    def purge(self, keys):
+        self.calls.append(keys)
+        if len(self.calls) == 1:
+            raise OSError("proxy unavailable")
+
+
+@override_settings(CACHE_PURGE_BACKEND="main.purge.HTTPPurgeBackend")
+class CachePurgeTests(BundleTestData, TestCase):
+    def setUp(self):
+        self.server = self.enterContext(LocalPurgeServer())
+        self.enterContext(override_settings(CACHE_PURGE_URL=self.server.url))
+        get_purge_backend.cache_clear()
+        self.addCleanup(get_purge_backend.cache_clear)
+
+    @contextmanager
+    def committed(self):
+        """Run the block's on-commit hooks, then wait for the purges they queued."""
+        with self.captureOnCommitCallbacks(execute=True):
+            yield
+        wait_for_purges()
+
+    def test_bundle_response_carries_cache_headers(self):
+        response = self.get_bundle("deu")
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=60, s-maxage=604800")
+        self.assertCountEqual(
+            response["Surrogate-Key"].split(),
+            [
+                f"situation-{self.situation.pk}",
+                "language-deu",
+                "language-eng",
+                f"communication-{self.greeting.pk}-language-{self.deu.pk}",
+                f"communication-{self.farewell.pk}-language-{self.deu.pk}",
+                f"communication-{self.farewell.pk}",
+                f"utterance-{self.tschuess.pk}",
+            ],
+        )
+
+    def test_admin_save_purges_only_after_commit(self):
+        with self.committed():
+            self.greeting.description = "Friendly greeting"
+            self.greeting.save()
+            self.assertEqual(self.server.requests, [])
+
+        self.assertEqual(self.server.purged_keys, {f"communication-{self.greeting.pk}"})
+        self.assertEqual(self.server.requests[0][0], "PURGE")
+
+    def test_rolled_back_changes_are_not_purged(self):
+        with self.committed():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.farewell.description = "Goodbye"
+                self.farewell.save()
+                raise RuntimeError
+            self.greeting.save()
+
+        self.assertEqual(self.server.purged_keys, {f"communication-{self.greeting.pk}"})
+
+    def test_new_utterance_purges_bundles_that_lacked_its_communication(self):
+        cached_keys = set(self.get_bundle("deu")["Surrogate-Key"].split())
+        self.assertNotIn(f"communication-{self.greeting.pk}", cached_keys)
+
+        with self.committed():
+            Utterance.objects.create(communication=self.greeting, language=self.deu, content="Hallo")
+
+        self.assertIn(
+            f"communication-{self.greeting.pk}-language-{self.deu.pk}",
+            self.server.purged_keys & cached_keys,
+        )
+
+    def test_utterance_content_edit_does_not_purge_situation(self):
+        with self.committed():
+            self.hola.content = "¡Hola!"
+            self.hola.save()
+
+        self.assertEqual(self.server.purged_keys, {f"utterance-{self.hola.pk}"})
+
+    def test_moved_utterance_purges_old_and_new_communication(self):
+        other = Situation.objects.create(description="Leaving.")
+        other.target_languages.add(self.spa)
+        self.farewell.situations.add(other)
+        greeting_keys = set(self.get_bundle("spa")["Surrogate-Key"].split())
+        farewell_keys = set(
+            self.client.get(
+                f"/api/situations/{other.pk}/", {"target_lang": "spa", "native_lang": "eng"}
+            )["Surrogate-Key"].split()
+        )
+
+        with self.committed():
+            self.hola.communication = self.farewell
+            self.hola.save()
+
+        self.assertIn(f"utterance-{self.hola.pk}", self.server.purged_keys & greeting_keys)
+        self.assertIn(
+            f"communication-{self.farewell.pk}-language-{self.spa.pk}",
+            self.server.purged_keys & farewell_keys,
+        )
+        self.assertIn(
+            f"communication-{self.greeting.pk}-language-{self.spa.pk}", self.server.purged_keys
+        )
+
+    def test_moved_context_purges_old_and_new_utterance(self):
+        context = Context.objects.create(utterance=self.hola, context_type="formal", description="")
+        context = Context.objects.get(pk=context.pk)
+
+        with self.committed():
+            context.utterance = self.tschuess
+            context.save()
+
+        self.assertEqual(
+            self.server.purged_keys,
+            {f"utterance-{self.hola.pk}", f"utterance-{self.tschuess.pk}"},
+        )
+
+    def test_language_code_change_purges_old_and_new_code(self):
+        cached_keys = set(self.get_bundle("spa")["Surrogate-Key"].split())
+
+        with self.committed():
+            self.spa.code = "es"
+            self.spa.save()
+
+        self.assertEqual(self.server.purged_keys, {"languages", "language-spa", "language-es"})
+        self.assertIn("language-spa", cached_keys)
+
+    def test_bundle_put_purges_only_after_commit(self):
+        self.client.force_login(self.staff)
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"][0]["content"] = "¡Hola!"
+
+        with self.committed():
+            response = self.put_bundle(bundle, "spa")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.server.requests, [])
+
+        self.assertEqual(self.server.purged_keys, {f"utterance-{self.hola.pk}"})
+
+    def test_bundle_put_with_other_language_utterance_purges_situation(self):
+        self.client.force_login(self.staff)
+        cached_keys = set(self.get_bundle("deu")["Surrogate-Key"].split())
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"].append(
+            {"language": "deu", "transliteration": "", "content": "Hallo", "contexts": []}
+        )
+
+        with self.committed():
+            self.put_bundle(bundle, "spa")
+
+        self.assertIn(
+            f"communication-{self.greeting.pk}-language-{self.deu.pk}",
+            self.server.purged_keys & cached_keys,
+        )
+
+    @override_settings(
+        CACHE_PURGE_BACKEND="main.tests.FlakyPurgeBackend", CACHE_PURGE_RETRY_DELAY=0
+    )
+    def test_failed_purge_is_retried(self):
+        FlakyPurgeBackend.calls = []
+
+        with self.assertLogs("main.purge", "WARNING") as logs, self.committed():
+            self.greeting.save()
+
+        self.assertEqual(FlakyPurgeBackend.calls, [[f"communication-{self.greeting.pk}"]] * 2)
+        self.assertIn("retrying", logs.output[0])
+
+    def test_unchanged_bundle_put_sends_no_purge(self):
+        self.client.force_login(self.staff)
+        bundle = self.get_bundle("spa").json()
+
+        with self.committed():
+            self.put_bundle(bundle, "spa")
+
+        self.assertEqual(self.server.requests, [])
+
+
+class SituationBundleWriteTests(BundleTestData, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.hallo = Utterance.objects.create(communication=cls.greeting, language=cls.deu, content="Hallo")
+        cls.formal = Context.objects.create(utterance=cls.hola, context_type="formal", description="Polite.")
+        cls.prompt = Prompt.objects.create(description="Say hello.")
+        cls.prompt.situations.add(cls.situation)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def timestamps(self):
+        return {
+            (model.__name__, pk): last_updated
+            for model in (Situation, Prompt, Communication, Utterance)
+            for pk, last_updated in model.objects.values_list("pk", "last_updated")
+        }
+
+    def assert_nothing_written(self, stats):
+        for counts in stats.values():
+            self.assertEqual(counts, {"created": 0, "updated": 0, "deleted": 0})
+
+    def test_unchanged_round_trip_writes_nothing(self):
+        before = self.timestamps()
+
+        response = self.put_bundle(self.get_bundle("spa").json(), "spa")
+
+        self.assertEqual(response.status_code, 200)
+        self.assert_nothing_written(response.json())
+        self.assertEqual(self.timestamps(), before)
+
+    def test_edited_utterance_bumps_only_its_own_row(self):
+        before = self.timestamps()
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"][0]["content"] = "¡Hola!"
+
+        response = self.put_bundle(bundle, "spa")
+
+        self.assertEqual(response.json()["utterances"]["updated"], 1)
+        after = self.timestamps()
+        changed = {key for key in after if after[key] != before[key]}
+        self.assertEqual(changed, {("Utterance", self.hola.pk)})
+        self.hola.refresh_from_db()
+        self.assertEqual(self.hola.content, "¡Hola!")
+
+    def test_edited_context_bumps_only_its_utterance(self):
+        before = self.timestamps()
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"][0]["contexts"][0]["description"] = "Very polite."
+
+        response = self.put_bundle(bundle, "spa")
+
+        self.assertEqual(response.json()["contexts"]["updated"], 1)
+        after = self.timestamps()
+        changed = {key for key in after if after[key] != before[key]}
+        self.assertEqual(changed, {("Utterance", self.hola.pk)})
+        self.formal.refresh_from_db()
+        self.assertEqual(self.formal.description, "Very polite.")
+
+    def test_other_language_content_is_left_alone(self):
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"].append(
+            {"language": "deu", "transliteration": "", "content": "Guten Tag", "contexts": []}
+        )
+
+        response = self.put_bundle(bundle, "spa")
+
+        stats = response.json()
+        self.assertEqual(stats["communications"]["deleted"], 0)
+        self.assertEqual(stats["utterances"], {"created": 1, "updated": 0, "deleted": 0})
+        self.assertTrue(Utterance.objects.filter(pk=self.hallo.pk).exists())
+        self.assertIn(self.farewell, self.situation.communications_of_situation.all())
+
+    def test_omitted_communication_loses_only_target_lang_utterances(self):
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"] = []
+
+        response = self.put_bundle(bundle, "spa")
+
+        stats = response.json()
+        self.assertEqual(stats["communications"]["deleted"], 0)
+        self.assertEqual(stats["utterances"]["deleted"], 1)
+        self.assertFalse(Utterance.objects.filter(pk=self.hola.pk).exists())
+        self.assertTrue(Utterance.objects.filter(pk=self.hallo.pk).exists())
+        self.assertIn(self.greeting, self.situation.communications_of_situation.all())
+        deu_bundle = self.get_bundle("deu").json()
+        self.assertIn(self.greeting.pk, [c["id"] for c in deu_bundle["communications"]])
+
+    def test_removals_are_skipped_without_target_lang(self):
+        bundle = self.get_bundle("spa").json()
+        bundle["communications"][0]["utterances"] = []
+
+        response = self.put_bundle(bundle)
+
+        self.assert_nothing_written(response.json())
+        self.assertTrue(Utterance.objects.filter(pk=self.hola.pk).exists())
+
+    def test_missing_field_is_rejected_without_changes(self):
+        bundle = self.get_bundle("spa").json()
+        del bundle["situation"]["image_url"]
+        del bundle["prompts"]
+
+        response = self.put_bundle(bundle, "spa")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(self.prompt, self.situation.prompts.all())
+
+    def test_validation_error_rolls_back_everything(self):
+        before = self.timestamps()
+        bundle = self.get_bundle("spa").json()
+        bundle["situation"]["description"] = "Changed."
+        bundle["prompts"].append({"description": "New prompt."})
+        bundle["communications"][0]["utterances"][0]["content"] = "¡Hola!"
+        bundle["communications"].append(
+            {
+                "id": 999_999,
+                "description": "Not part of this situation.",
+                "shouldBeExpressed": True,
+                "shouldBeUnderstood": True,
+                "utterances": [],
+            }
+        )
+
+        response = self.put_bundle(bundle, "spa")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.timestamps(), before)
+        self.assertEqual(Prompt.objects.count(), 1)
+        self.situation.refresh_from_db()
+        self.assertEqual(self.situation.description, "Meeting someone.")
+
+
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        cls.member = User.objects.create_user("member")
+
+    def setUp(self):
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(
+            override_settings(API_PROFILING_ENABLED=True, API_PROFILING_DIR=self.directory)
+        )
+
+    def profiled_get(self):
+        return self.client.get("/api/languages/", HTTP_X_PROFILE="1")
+
+    def test_non_staff_request_is_not_profiled(self):
+        self.client.force_login(self.member)
+
+        response = self.profiled_get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_staff_request_stores_profile(self):
+        self.client.force_login(self.staff)
+
+        response = self.profiled_get()
+
+        profile_id = response["X-Profile-Id"]
+        self.assertEqual(response["Cache-Control"], "private, no-store")
+        self.assertEqual(
+            sorted(path.name for path in self.directory.iterdir()),
+            [f"{profile_id}.folded", f"{profile_id}.json", f"{profile_id}.prof"],
+        )
+        summary = json.loads((self.directory / f"{profile_id}.json").read_text())
+        self.assertEqual(summary["path"], "/api/languages/")
+        self.assertEqual(summary["sql_count"], len(summary["sql"]))
+        self.assertGreaterEqual(summary["sql_count"], 1)
+
+    def test_retention_keeps_newest_profiles(self):
+        self.client.force_login(self.staff)
+
+        with override_settings(API_PROFILING_MAX_PROFILES=2):
+            for _ in range(3):
+                self.profiled_get()
+
+        self.assertEqual(len(list(self.directory.glob("*.json"))), 2)
+        self.assertEqual(len(list(self.directory.iterdir())), 6)
+
+    def test_retention_drops_expired_profiles(self):
+        self.client.force_login(self.staff)
+        expired = time.time() - 3600
+        for suffix in (".json", ".prof", ".folded"):
+            path = self.directory / f"old{suffix}"
+            path.write_text("")
+            os.utime(path, (expired, expired))
+
+        with override_settings(API_PROFILING_MAX_AGE_SECONDS=60):
+            response = self.profiled_get()
+
+        self.assertEqual(
+            sorted(path.stem for path in self.directory.iterdir()),
+            [response["X-Profile-Id"]] * 3,
+        )
+
+    def test_concurrent_profile_is_skipped(self):
+        self.client.force_login(self.staff)
+        profiling._profile_lock.acquire()
+        self.addCleanup(profiling._profile_lock.release)
+
+        response = self.profiled_get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Profile-Skipped"], "busy")
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(list(self.directory.iterdir()), [])
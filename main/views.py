@@ -1,5 +1,5 @@
 from django.db.models import Prefetch
-from rest_framework import generics, status
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -12,16 +12,39 @@ from .models import (
     Situation,
     Utterance,
 )
-from .serializers import LanguageSerializer, SituationSerializer
+from .bundles import SituationBundleWriter
+from .caching import (
+    LANGUAGES_KEY,
+    SITUATIONS_KEY,
+    CachePolicyMixin,
+    communication_key,
+    communication_language_key,
+    context_type_key,
+    language_key,
+    prompt_key,
+    situation_key,
+    utterance_key,
+)
+from .serializers import LanguageSerializer, SituationBundleSerializer, SituationSerializer
 
 
-class LanguageListView(generics.ListAPIView):
+class LanguageListView(CachePolicyMixin, generics.ListAPIView):
     queryset = Language.objects.order_by("code")
     serializer_class = LanguageSerializer
+    cache_policy = "language-list"
+
+    def get_surrogate_keys(self, request, response):
+        return [LANGUAGES_KEY]
 
 
-class SituationsByLanguageView(generics.ListAPIView):
+class SituationsByLanguageView(CachePolicyMixin, generics.ListAPIView):
     serializer_class = SituationSerializer
+    cache_policy = "situations-by-language"
+
+    def get_surrogate_keys(self, request, response):
+        keys = [SITUATIONS_KEY, language_key(self.kwargs["language_code"])]
+        keys.extend(situation_key(item["id"]) for item in response.data)
+        return keys
 
     def get_queryset(self):
         language_code = self.kwargs["language_code"]
@@ -37,7 +60,59 @@ class SituationsByLanguageView(generics.ListAPIView):
         return context
 
 
-class SituationDetailView(APIView):
+class SituationDetailView(CachePolicyMixin, APIView):
+    cache_policy = "situation-detail"
+
+    def get_surrogate_keys(self, request, response):
+        data = response.data
+        keys = [
+            situation_key(data["situation"]["id"]),
+            language_key(request.query_params["target_lang"]),
+            language_key(request.query_params["native_lang"]),
+        ]
+        keys.extend(prompt_key(prompt["id"]) for prompt in data["prompts"])
+        # Communications without target-language utterances are left out of
+        # the bundle, so tag all of them: gaining an utterance adds them.
+        keys.extend(
+            communication_language_key(communication_id, self.target_language_id)
+            for communication_id in Communication.situations.through.objects.filter(
+                situation_id=data["situation"]["id"]
+            ).values_list("communication_id", flat=True)
+        )
+        for communication in data["communications"]:
+            keys.append(communication_key(communication["id"]))
+            for utterance in communication["utterances"]:
+                keys.append(utterance_key(utterance["id"]))
+                keys.extend(
+                    context_type_key(context["context_type"])
+                    for context in utterance["contexts"]
+                )
+        return keys
+
+    def get_permissions(self):
+        if self.request.method == "PUT":
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+    def put(self, request, situation_id: int):
+        try:
+            situation = Situation.objects.get(pk=situation_id)
+        except Situation.DoesNotExist:
+            return Response(
+                {"detail": f"Situation with id {situation_id} not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = SituationBundleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        writer = SituationBundleWriter(
+            situation,
+            serializer.validated_data,
+            target_lang=request.query_params.get("target_lang"),
+        )
+        return Response(writer.apply())
+
     def get(self, request, situation_id: int):
         target_lang = request.query_params.get("target_lang")
         native_lang = request.query_params.get("native_lang")
@@ -82,13 +157,15 @@ class SituationDetailView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if not situation.target_languages.filter(code=target_lang).exists():
+        target_language = situation.target_languages.filter(code=target_lang).first()
+        if target_language is None:
             return Response(
                 {
                     "detail": f"Situation {situation_id} has no communications with utterances in language '{target_lang}'."
                 },
                 status=status.HTTP_404_NOT_FOUND,
             )
+        self.target_language_id = target_language.pk
 
         situation_payload = self._serialize_situation(situation, native_lang)
         prompts_payload = self._serialize_prompts(situation.prompts.all())